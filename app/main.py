@@ -1,7 +1,12 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import csv
+import io
+import logging
 import sys
 import os
+import threading
+import time
 
 # 添加项目根目录到 Python 路径，以便导入 config
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -27,8 +32,10 @@ from fastapi import Cookie, FastAPI, Form, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse
 from itsdangerous import URLSafeSerializer
 import secrets
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 
+from .models import GroupInfo, OkResponse, ProgressResponse, SessionCreateResponse
+from .utils import setup_logging
 from .storage import (
     ScoreRecord,
     _active_session_id,
@@ -37,12 +44,14 @@ from .storage import (
     compute_averages,
     create_session,
     delete_group,
+    delete_score as delete_score_record,
     delete_session,
     delete_submissions_by_rater,
     detect_score_anomalies,
     get_all_groups,
-    get_all_scores,
-    get_conn,
+    get_scorable_scores,
+    get_submitted_raters,
+    get_reader_conn,
     get_existing_submission,
     get_scores_by_rater,
     list_sessions,
@@ -53,31 +62,51 @@ from .storage import (
     save_presentation_order,
     release_lock,
     reset_all,
+    reset_rater,
     set_active_session,
     toggle_group_scorable,
+    unlock_rater,
 )
 
 
 app = FastAPI(title="Abacus to Quantum - Scoring")
+logger = logging.getLogger(__name__)
 
 
-# Templates
+# 生产模式（ENV=prod）：模板不再逐次检查文件变更
+IS_PROD = os.getenv("ENV") == "prod"
+
+# Templates（编译后的字节码缓存到磁盘，重启后免重新编译）
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", ".jinja_cache")
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
 templates_env = Environment(
     loader=FileSystemLoader("app/templates"),
     autoescape=select_autoescape(["html", "xml"]),
+    bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR, "%s.cache"),
+    auto_reload=not IS_PROD,
 )
 
-_session_secret = (
-    secrets.token_urlsafe(48)
-    if not SESSION_SECRET or SESSION_SECRET == "please-set-session-secret"
-    else SESSION_SECRET
-)
+# 未配置时仅为开发环境生成临时密钥（每个进程各不相同，重启后旧 cookie 全部失效）
+_SESSION_SECRET_MISSING = not SESSION_SECRET or SESSION_SECRET == "please-set-session-secret"
+_session_secret = secrets.token_urlsafe(48) if _SESSION_SECRET_MISSING else SESSION_SECRET
 SESSION_SIGNER = URLSafeSerializer(_session_secret)
 ADMIN_SESSION_COOKIE = "abacus_admin"
 
+# 签名校验结果缓存：cookie -> (校验时间, payload)，避免每次请求重复计算 HMAC
+_TOKEN_CACHE_TTL = 60
+_TOKEN_CACHE_MAX = 1024
+_token_cache: Dict[str, Tuple[float, dict]] = {}
+_token_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_template(name: str):
+    # 模板集合小且固定：生产模式下直接复用已加载的模板对象
+    return templates_env.get_template(name)
+
 
 def render_template(name: str, **ctx: Dict) -> HTMLResponse:
-    template = templates_env.get_template(name)
+    template = _get_template(name) if IS_PROD else templates_env.get_template(name)
     # 自动注入全局配置到所有模板
     ctx.setdefault('course_name', COURSE_NAME)
     ctx.setdefault('course_institution', COURSE_INSTITUTION)
@@ -86,69 +115,91 @@ def render_template(name: str, **ctx: Dict) -> HTMLResponse:
 
 @app.on_event("startup")
 def _startup() -> None:
+    setup_logging()
+    if _SESSION_SECRET_MISSING:
+        if IS_PROD:
+            raise RuntimeError("生产环境（ENV=prod）必须设置 SESSION_SECRET")
+        logger.warning("未设置 SESSION_SECRET，已使用临时随机密钥；多进程或重启后会话将失效")
+    # init_db 建表并打开进程共享的写连接；只读连接由各工作线程首次查询时创建
     init_db()
 
 
+def _verify(cookie: str) -> Optional[dict]:
+    """校验签名 cookie，返回 payload；无效则返回 None"""
+    now = time.monotonic()
+    with _token_cache_lock:
+        cached = _token_cache.get(cookie)
+    if cached and now - cached[0] < _TOKEN_CACHE_TTL:
+        return cached[1]
+    try:
+        data = SESSION_SIGNER.loads(cookie)
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    # 同步端点运行在线程池中：淘汰与写入需持锁，避免并发淘汰同一条目
+    with _token_cache_lock:
+        _token_cache.pop(cookie, None)
+        if len(_token_cache) >= _TOKEN_CACHE_MAX:
+            # FIFO 淘汰最早写入的条目
+            _token_cache.pop(next(iter(_token_cache)), None)
+        _token_cache[cookie] = (now, data)
+    return data
+
+
 def get_or_create_token(response: Response, token_cookie: Optional[str]) -> str:
-    if token_cookie:
-        try:
-            SESSION_SIGNER.loads(token_cookie)
-            return token_cookie
-        except Exception:
-            pass
-    token = SESSION_SIGNER.dumps({"created": datetime.utcnow().isoformat()})
+    if token_cookie and _verify(token_cookie) is not None:
+        return token_cookie
+    token = SESSION_SIGNER.dumps({"c": int(time.time())})
     response.set_cookie(SESSION_COOKIE_NAME, token, max_age=60 * 60 * 24 * 7, httponly=True)
     return token
 
 
 def _set_admin_session(response: Response) -> None:
-    token = SESSION_SIGNER.dumps({"admin": True, "created": datetime.utcnow().isoformat()})
+    token = SESSION_SIGNER.dumps({"a": 1, "c": int(time.time())})
     response.set_cookie(ADMIN_SESSION_COOKIE, token, max_age=60 * 60 * 4, httponly=True)
 
 
-def _is_admin_session(admin_cookie: Optional[str]) -> bool:
+def _is_admin_session(admin_cookie: Optional[str]) -> Optional[dict]:
+    """校验管理员 cookie，成功时返回已解码的 payload，否则返回 None"""
     if not admin_cookie:
-        return False
-    try:
-        data = SESSION_SIGNER.loads(admin_cookie)
-        return bool(data.get("admin"))
-    except Exception:
-        return False
+        return None
+    data = _verify(admin_cookie)
+    # "admin" 为旧版 cookie 的字段名
+    if data and (data.get("a") or data.get("admin")):
+        return data
+    return None
 
 
 @app.get("/", response_class=HTMLResponse)
 def index() -> HTMLResponse:
-    from .storage import get_conn, _active_session_id
-    
     # Get active session info
-    session_name = None
-    session_topic = None
-    with get_conn() as conn:
+    # 场次名称与主题（settings 中的 session_topic）合并为一次查询
+    with get_reader_conn() as conn:
         sid = _active_session_id(conn)
-        row = conn.execute("SELECT name FROM sessions WHERE id=?", (sid,)).fetchone()
-        if row:
-            session_name = row["name"]
-        # Try to get session topic from settings
-        topic_row = conn.execute("SELECT value FROM settings WHERE key='session_topic'").fetchone()
-        if topic_row:
-            session_topic = topic_row[0]
+        session_name, session_topic = conn.execute(
+            "SELECT (SELECT name FROM sessions WHERE id=?),"
+            " (SELECT value FROM settings WHERE key='session_topic')",
+            (sid,),
+        ).fetchone()
     
     # Get presentation order and filter preview to only scorable groups
-    all_groups = get_all_groups()
-    scorable_names = {g["name"] for g in all_groups if g.get("scorable")}
+    # Homepage rater select should include ALL groups from DB; no hardcoded extra options
+    rater_groups = []
+    scorable_names = set()
+    for g in get_all_groups():
+        rater_groups.append(g["name"])
+        if g.get("scorable"):
+            scorable_names.add(g["name"])
     presentation_order = get_presentation_order()
     filtered_order = [g for g in (presentation_order or []) if g in scorable_names]
-    presentation_with_idx = [(i + 1, g) for i, g in enumerate(filtered_order)]
-    
-    # Homepage rater select should include ALL groups from DB; no hardcoded extra options
-    rater_groups = [g["name"] for g in all_groups]
-    
+
     return render_template(
         "index.html",
         rater_groups=rater_groups,
         session_name=session_name,
         session_topic=session_topic,
-        presentation_order=presentation_with_idx,
+        presentation_order=list(enumerate(filtered_order, 1)),
     )
 
 
@@ -217,6 +268,15 @@ def start(
     )
 
 
+def _to_float(s: Optional[str]) -> Optional[float]:
+    if not s:
+        return None
+    try:
+        return float(s)
+    except (ValueError, TypeError):
+        return None
+
+
 @app.post("/submit")
 async def submit(
     rater: str = Form(...),
@@ -236,11 +296,10 @@ async def submit(
         delete_submissions_by_rater(rater)
 
     # Parse dynamic fields
-    form = dict(await request.form())  # type: ignore
+    form = await request.form()  # type: ignore
 
-    # Collect targets from form
-    targets: List[str] = [key.split("_")[1] for key in form.keys() if key.startswith("total_")]
-    targets = sorted(set(targets))
+    # Collect targets from form（直接在 FormData 上取值，无需再复制为 dict）
+    targets: List[str] = sorted({key.split("_", 1)[1] for key in form if key.startswith("total_")})
 
     if not targets:
         return render_template("message.html", title="无数据", message="未接收到任何评分数据。")
@@ -253,18 +312,10 @@ async def submit(
         logic_str = form.get(f"logic_{t}") or ""
         analysis_str = form.get(f"analysis_{t}") or ""
 
-        def to_float(s: str) -> Optional[float]:
-            try:
-                if s == "":
-                    return None
-                return float(s)
-            except Exception:
-                return None
-
-        total = to_float(total_str)
-        solve = to_float(solve_str)
-        logic = to_float(logic_str)
-        analysis = to_float(analysis_str)
+        total = _to_float(total_str)
+        solve = _to_float(solve_str)
+        logic = _to_float(logic_str)
+        analysis = _to_float(analysis_str)
 
         if total is None and any(v is not None for v in [solve, logic, analysis]):
             # 计算总分（百分制）：(solve+logic+analysis)*10，四舍五入，0..100
@@ -313,45 +364,33 @@ def admin_panel(request: Request, response: Response, key: Optional[str] = None,
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     
-    # 获取所有组（排除教学组，教学组不应作为特殊组出现）
-    all_groups = get_all_groups()
-    groups = [g["name"] for g in all_groups if g.get("scorable", True)]  # 只显示可被评分的组
-    
-    # 获取锁状态（基于是否已提交）
-    locked_raters = set()
-    with get_conn() as conn:
-        sid = _active_session_id(conn)
-        rows = conn.execute("SELECT DISTINCT rater FROM submissions2 WHERE session_id=?", (sid,)).fetchall()
-        for row in rows:
-            locked_raters.add(row["rater"])
-    
-    # 获取发表顺序
-    presentation_order = get_presentation_order()
-    
-    # 获取平均分
-    averages = compute_averages()
-    
-    # 获取所有评分详情
-    all_scores = get_all_scores()
-    
+    # 整个管理面板共用一个连接，避免每个查询各自建连
+    with get_reader_conn() as conn:
+        # 获取所有组（排除教学组，教学组不应作为特殊组出现）
+        all_groups = get_all_groups(conn)
+        groups = [g["name"] for g in all_groups if g.get("scorable", True)]  # 只显示可被评分的组
+
+        # 获取锁状态（基于是否已提交）
+        locked_raters = get_submitted_raters(conn)
+
+        # 获取发表顺序
+        presentation_order = get_presentation_order(conn)
+
+        # 获取平均分
+        averages = compute_averages(conn)
+
+        # 获取评分详情（SQL 中已过滤为可评分组之间的评分）
+        scores = get_scorable_scores(conn)
+
+        sessions = list_sessions(conn)
+        anomalies = detect_score_anomalies(conn)
+
     # 将评分数据组织成表格形式（只包含可被评分的组）
-    score_matrix = {}
-    all_raters = set(g["name"] for g in all_groups if g.get("scorable", True))
-    for r in all_raters:
-        score_matrix[r] = {}
-
-    for score in all_scores:
-        rater = score["rater"]
-        target = score["target"]
-        # 只显示评分者和被评分者都是可被评分的组
-        if rater in all_raters and target in all_raters:
-            if rater not in score_matrix:
-                score_matrix[rater] = {}
-            score_matrix[rater][target] = score
-    
-    sessions = list_sessions()
-    anomalies = detect_score_anomalies()
-    
+    # groups 来自带 TTL 的缓存，可能晚于评分数据：缺失的评分组按需补行，不抛 KeyError
+    score_matrix = {name: {} for name in groups}
+    for score in scores:
+        score_matrix.setdefault(score["rater"], {})[score["target"]] = score
+
     return render_template(
         "admin.html", 
         groups=groups,
@@ -379,12 +418,20 @@ def export_csv(admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_S
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     rows = compute_averages()
-    # Build CSV
-    lines = ["target,average,ratings\n"]
-    for r in rows:
-        lines.append(f"{r['target']},{r['average']:.2f},{r['count']}\n")
-    data = "".join(lines).encode("utf-8")
-    return StreamingResponse(iter([data]), media_type="text/csv")
+
+    def _iter():
+        # 逐行生成 CSV（csv.writer 负责组名中逗号/引号的转义）
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(["target", "average", "ratings"])
+        for r in rows:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+            writer.writerow([r["target"], f"{r['average']:.2f}", r["count"]])
+        yield buf.getvalue().encode("utf-8")
+
+    return StreamingResponse(_iter(), media_type="text/csv")
 
 
 @app.get("/presentation-order", response_class=HTMLResponse)
@@ -396,8 +443,8 @@ def presentation_order_page(admin_session: Optional[str] = Cookie(default=None,
     return RedirectResponse(url="/admin#presentation")
 
 
-@app.post("/save-presentation-order")
-def save_order(order: dict, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/save-presentation-order", response_model=OkResponse, response_model_exclude_none=True)
+def save_order(order: dict, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> OkResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     
@@ -405,37 +452,38 @@ def save_order(order: dict, admin_session: Optional[str] = Cookie(default=None,
         raise HTTPException(status_code=400, detail="缺少顺序数据")
     
     success = save_presentation_order(order["order"])
-    return {"ok": success}
+    return OkResponse(ok=success)
 
 
-@app.post("/admin/session/create")
-def admin_create_session(name: str, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/admin/session/create", response_model=SessionCreateResponse, response_model_exclude_none=True)
+def admin_create_session(name: str, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> SessionCreateResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     sid = create_session(name)
-    return {"ok": True, "id": sid}
+    return SessionCreateResponse(ok=True, id=sid)
 
 
-@app.post("/admin/session/activate")
-def admin_activate_session(session_id: int, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/admin/session/activate", response_model=OkResponse, response_model_exclude_none=True)
+def admin_activate_session(session_id: int, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> OkResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
-    set_active_session(session_id)
-    return {"ok": True}
+    if not set_active_session(session_id):
+        return OkResponse(ok=False, error="场次不存在")
+    return OkResponse(ok=True)
 
 
-@app.post("/admin/session/delete")
-def admin_delete_session(session_id: int, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/admin/session/delete", response_model=OkResponse, response_model_exclude_none=True)
+def admin_delete_session(session_id: int, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> OkResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     success = delete_session(session_id)
     if not success:
-        return {"ok": False, "error": "不能删除当前活跃场次"}
-    return {"ok": True}
+        return OkResponse(ok=False, error="不能删除当前活跃场次")
+    return OkResponse(ok=True)
 
 
-@app.post("/admin/groups/add")
-def admin_add_group(group: dict, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/admin/groups/add", response_model=OkResponse, response_model_exclude_none=True)
+def admin_add_group(group: dict, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> OkResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     name = group.get("name")
@@ -445,20 +493,20 @@ def admin_add_group(group: dict, admin_session: Optional[str] = Cookie(default=N
     
     success = add_group(name, scorable)
     if not success:
-        return {"ok": False, "error": f"组名 '{name}' 已存在"}
-    return {"ok": success}
+        return OkResponse(ok=False, error=f"组名 '{name}' 已存在")
+    return OkResponse(ok=success)
 
 
-@app.post("/admin/groups/delete")
-def admin_delete_group(name: str, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/admin/groups/delete", response_model=OkResponse, response_model_exclude_none=True)
+def admin_delete_group(name: str, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> OkResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     success = delete_group(name)
-    return {"ok": success}
+    return OkResponse(ok=success)
 
 
-@app.post("/admin/groups/toggle-scorable")
-def admin_toggle_scorable(group: dict, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.post("/admin/groups/toggle-scorable", response_model=OkResponse, response_model_exclude_none=True)
+def admin_toggle_scorable(group: dict, admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> OkResponse:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     name = group.get("name")
@@ -466,11 +514,11 @@ def admin_toggle_scorable(group: dict, admin_session: Optional[str] = Cookie(def
     if not name or scorable is None:
         raise HTTPException(status_code=400, detail="缺少参数")
     success = toggle_group_scorable(name, scorable)
-    return {"ok": success}
+    return OkResponse(ok=success)
 
 
-@app.get("/admin/groups")
-def admin_get_groups(admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)):
+@app.get("/admin/groups", response_model=List[GroupInfo])
+def admin_get_groups(admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_SESSION_COOKIE)) -> List[dict]:
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     groups = get_all_groups()
@@ -482,12 +530,8 @@ def admin_release_lock(rater: str, admin_session: Optional[str] = Cookie(default
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
 
-    release_lock(rater)
-    # Also delete submission record to allow re-submission
-    with get_conn() as conn:
-        from .storage import _active_session_id
-        sid = _active_session_id(conn)
-        conn.execute("DELETE FROM submissions2 WHERE rater=? AND session_id=?", (rater, sid))
+    # 释放锁并删除提交记录（允许重新提交）
+    unlock_rater(rater)
     return {"ok": True}
 
 
@@ -497,15 +541,7 @@ def admin_reset_rater(rater: str, admin_session: Optional[str] = Cookie(default=
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
     
-    with get_conn() as conn:
-        sid = _active_session_id(conn)
-        # 删除该组提交的所有评分
-        conn.execute("DELETE FROM scores2 WHERE rater=? AND session_id=?", (rater, sid))
-        # 删除提交记录（解锁）
-        conn.execute("DELETE FROM submissions2 WHERE rater=? AND session_id=?", (rater, sid))
-        # 释放锁
-        conn.execute("DELETE FROM locks2 WHERE rater=? AND session_id=?", (rater, sid))
-    
+    reset_rater(rater)
     return {"ok": True}
 
 
@@ -518,10 +554,7 @@ async def delete_score(
     if not _is_admin_session(admin_session):
         raise HTTPException(status_code=403, detail="需要管理员登录")
 
-    with get_conn() as conn:
-        sid = _active_session_id(conn)
-        conn.execute("DELETE FROM scores2 WHERE rater=? AND target=? AND session_id=?", (rater, target, sid))
-
+    delete_score_record(rater, target)
     return {"ok": True}
 
 
@@ -533,32 +566,24 @@ def admin_reset(admin_session: Optional[str] = Cookie(default=None, alias=ADMIN_
     return {"ok": True}
 
 
-@app.get("/api/progress")
-def get_progress():
+@app.get("/api/progress", response_model=ProgressResponse)
+def get_progress() -> ProgressResponse:
     """获取当前场次的评分进度"""
-    with get_conn() as conn:
-        sid = _active_session_id(conn)
-        
-        # 获取所有可评分的组（排除教学组）
-        all_groups = get_all_groups()
-        scorable_groups = [g["name"] for g in all_groups if g.get("scorable")]
-        total = len(scorable_groups)
-        
-        # 获取已提交评分的组数
-        submitted = conn.execute(
-            "SELECT COUNT(DISTINCT rater) as cnt FROM submissions2 WHERE session_id=?",
-            (sid,)
-        ).fetchone()
-        submitted_count = submitted["cnt"] if submitted else 0
-        
-        # 计算进度百分比
-        progress = (submitted_count / total * 100) if total > 0 else 0
-        
-        return {
-            "total": total,
-            "submitted": submitted_count,
-            "progress": round(progress, 1),
-            "remaining": total - submitted_count
-        }
+    # 获取所有可评分的组（排除教学组）
+    all_groups = get_all_groups()
+    scorable_groups = [g["name"] for g in all_groups if g.get("scorable")]
+    total = len(scorable_groups)
+
+    # 获取已提交评分的组数（只统计可评分组，保证不超过总数）
+    submitted = get_submitted_raters()
+    submitted_count = sum(1 for name in scorable_groups if name in submitted)
 
+    # 计算进度百分比
+    progress = (submitted_count / total * 100) if total > 0 else 0
 
+    return ProgressResponse(
+        total=total,
+        submitted=submitted_count,
+        progress=round(progress, 1),
+        remaining=total - submitted_count,
+    )
@@ -3,7 +3,9 @@
 保持简洁清爽，不过度复杂
 """
 from typing import Optional
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+from .utils import _strip_dangerous
 
 
 class ScoreInput(BaseModel):
@@ -15,7 +17,8 @@ class ScoreInput(BaseModel):
     logic: Optional[float] = Field(None, ge=0, le=3, description="答辩逻辑性（0-3）")
     analysis: Optional[float] = Field(None, ge=0, le=3, description="分析与总结（0-3）")
     
-    @validator('total')
+    @field_validator('total')
+    @classmethod
     def round_total(cls, v):
         """总分四舍五入到整数"""
         return round(v)
@@ -26,14 +29,12 @@ class GroupInput(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
     scorable: bool = Field(default=True, description="是否可被评分")
     
-    @validator('name')
+    @field_validator('name')
+    @classmethod
     def clean_name(cls, v):
         """清理组别名称"""
         # 移除危险字符
-        dangerous = ['<', '>', '"', "'", ';', '--', '/*', '*/', 'script']
-        cleaned = v.strip()
-        for char in dangerous:
-            cleaned = cleaned.replace(char, '')
+        cleaned = _strip_dangerous(v.strip())
         if not cleaned:
             raise ValueError('组别名称不能为空')
         return cleaned
@@ -43,7 +44,8 @@ class SessionInput(BaseModel):
     """场次输入模型"""
     name: str = Field(..., min_length=1, max_length=100)
     
-    @validator('name')
+    @field_validator('name')
+    @classmethod
     def clean_session_name(cls, v):
         """清理场次名称"""
         cleaned = v.strip()
@@ -59,10 +61,27 @@ class ProgressResponse(BaseModel):
     progress: float = Field(..., ge=0, le=100)
     remaining: int = Field(..., ge=0)
     
-    @validator('submitted')
-    def validate_submitted(cls, v, values):
+    @field_validator('submitted')
+    @classmethod
+    def validate_submitted(cls, v, info: ValidationInfo):
         """验证已提交数不超过总数"""
-        if 'total' in values and v > values['total']:
+        if 'total' in info.data and v > info.data['total']:
             raise ValueError('已提交数不能超过总数')
         return v
 
+
+class GroupInfo(BaseModel):
+    """组别信息响应模型"""
+    name: str
+    scorable: bool
+
+
+class OkResponse(BaseModel):
+    """管理接口的通用响应模型（失败时附带错误信息）"""
+    ok: bool
+    error: Optional[str] = None
+
+
+class SessionCreateResponse(OkResponse):
+    """创建场次的响应模型"""
+    id: int
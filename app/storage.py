@@ -1,23 +1,212 @@
+import math
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from functools import wraps
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 # Use a neutral database filename for open source distribution
 DB_PATH = Path("app/ratings.db")
 
+# 进程内读缓存（组别、发表顺序等很少变化的数据），写操作后整体失效
+_cache: Dict[str, Tuple[float, Any]] = {}
+_cache_version = 0
+_cache_lock = threading.Lock()
+
+# 其他进程（多 worker）的写入不会通知本进程：跨请求共享的状态缓存最多保留这么久（秒）
+_SHARED_CACHE_TTL = 5.0
+
+# 平均分缓存：session_id -> (评分版本号, 载入时间, 结果)；本进程评分或组别变化时版本号递增，
+# 其他进程的写入则在超过 _SHARED_CACHE_TTL 后重新查询时看到
+_avg_cache: Dict[int, Tuple[int, float, List[dict]]] = {}
+_scores_version = 0
+
+
+def _bump_scores_version() -> None:
+    global _scores_version
+    with _cache_lock:
+        _scores_version += 1
+
+
+def _invalidate_cache() -> None:
+    global _cache_version, _scores_version
+    with _cache_lock:
+        _cache_version += 1
+        _cache.clear()
+        # 组别变化会影响平均分（只统计可评分组）
+        _scores_version += 1
+
+
+def ttl_cache(ttl: float) -> Callable:
+    """按函数名缓存返回值 ttl 秒；写入期间读取的旧结果不会被缓存"""
+    def decorator(func: Callable) -> Callable:
+        key = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            now = time.monotonic()
+            with _cache_lock:
+                entry = _cache.get(key)
+                version = _cache_version
+            if entry and now - entry[0] < ttl:
+                return entry[1]
+            value = func(*args, **kwargs)
+            with _cache_lock:
+                if version == _cache_version:
+                    _cache[key] = (now, value)
+            return value
+        return wrapper
+    return decorator
+
+
+# 连接池：一个进程共享的写连接（持锁串行使用）+ 每个线程一个只读连接
+_writer: Optional[sqlite3.Connection] = None
+_writer_lock = threading.RLock()
+_writer_depth = 0
+_readers = threading.local()
+
+
+def _tune(conn: sqlite3.Connection) -> sqlite3.Connection:
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
 
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
+@contextmanager
+def get_writer_conn() -> Iterator[sqlite3.Connection]:
+    """独占写连接：以 BEGIN IMMEDIATE 开启事务，退出时提交（异常时回滚）；同线程可嵌套"""
+    global _writer, _writer_depth
+    with _writer_lock:
+        if _writer is None:
+            DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            # 写连接长期存在，放大语句缓存以复用热点 SQL 的预编译结果
+            conn = _tune(sqlite3.connect(str(DB_PATH), check_same_thread=False, cached_statements=256))
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            _writer = conn
+        conn = _writer
+        if _writer_depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        _writer_depth += 1
+        try:
+            yield conn
+        except BaseException:
+            _writer_depth -= 1
+            if _writer_depth == 0:
+                conn.rollback()
+            raise
+        _writer_depth -= 1
+        if _writer_depth == 0:
+            conn.commit()
+
+
+def get_reader_conn() -> sqlite3.Connection:
+    """返回当前线程的只读连接（首次调用时创建）；结果行为普通 tuple，直接按位置解包"""
+    conn = getattr(_readers, "conn", None)
+    if conn is None:
+        uri = DB_PATH.resolve().as_uri() + "?mode=ro"
+        conn = _readers.conn = _tune(sqlite3.connect(uri, uri=True))
     return conn
 
 
+@contextmanager
+def _use_conn(conn: Optional[sqlite3.Connection] = None) -> Iterator[sqlite3.Connection]:
+    """复用调用方传入的连接；未传入时使用当前线程的只读连接"""
+    if conn is not None:
+        yield conn
+        return
+    with get_reader_conn() as own:
+        yield own
+
+
+# 按场次划分的数据表；session_id 外键级联删除，删除场次时相关数据随之删除
+_SESSION_TABLES = {
+    "locks2": """
+        CREATE TABLE IF NOT EXISTS locks2 (
+          rater TEXT NOT NULL,
+          token TEXT NOT NULL,
+          expires_at INTEGER NOT NULL,
+          session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+          PRIMARY KEY (rater, session_id)
+        )
+    """,
+    "submissions2": """
+        CREATE TABLE IF NOT EXISTS submissions2 (
+          rater TEXT NOT NULL,
+          created_at TEXT NOT NULL,
+          session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+          PRIMARY KEY (rater, session_id)
+        )
+    """,
+    "scores2": """
+        CREATE TABLE IF NOT EXISTS scores2 (
+          rater TEXT NOT NULL,
+          target TEXT NOT NULL,
+          total REAL NOT NULL,
+          solve REAL,
+          logic REAL,
+          analysis REAL,
+          session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+          PRIMARY KEY (rater, target, session_id)
+        )
+    """,
+    "presentation_order2": """
+        CREATE TABLE IF NOT EXISTS presentation_order2 (
+          id INTEGER PRIMARY KEY,
+          rater TEXT NOT NULL,
+          position INTEGER NOT NULL,
+          session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE
+        )
+    """,
+}
+
+
+def _needs_rebuild(conn: sqlite3.Connection, table: str) -> bool:
+    """旧版表缺少外键，或 locks2.expires_at 仍为 TEXT（现为整数时间戳）"""
+    if not conn.execute(f"PRAGMA foreign_key_list({table})").fetchone():
+        return True
+    if table == "locks2":
+        types = {r[1]: r[2] for r in conn.execute("PRAGMA table_info(locks2)")}
+        return types.get("expires_at") != "INTEGER"
+    return False
+
+
+def _ensure_session_tables(conn: sqlite3.Connection) -> None:
+    """创建按场次划分的表；结构过旧的表重建一次（孤立数据随之丢弃）"""
+    for table, ddl in _SESSION_TABLES.items():
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchone()
+        if exists and _needs_rebuild(conn, table):
+            conn.execute("SAVEPOINT rebuild_session_table")
+            try:
+                conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+                conn.execute(ddl)
+                conn.execute(
+                    f"INSERT INTO {table} SELECT * FROM {table}_old"
+                    " WHERE session_id IN (SELECT id FROM sessions)"
+                )
+                conn.execute(f"DROP TABLE {table}_old")
+            except Exception:
+                conn.execute("ROLLBACK TO rebuild_session_table")
+                raise
+            finally:
+                conn.execute("RELEASE rebuild_session_table")
+        else:
+            conn.execute(ddl)
+
+
 def init_db() -> None:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with get_conn() as conn:
-        conn.execute("PRAGMA journal_mode=WAL;")
+    with get_writer_conn() as conn:
         # Base tables
         conn.executescript(
             """
@@ -43,26 +232,7 @@ def init_db() -> None:
               analysis REAL,
               PRIMARY KEY (rater, target)
             );
-            """
-        )
-        # Seed groups if they don't exist
-        with conn:
-            # Add scorable column if not exists
-            try:
-                conn.execute("ALTER TABLE groups ADD COLUMN scorable INTEGER DEFAULT 1")
-            except Exception:
-                pass  # Column likely already exists
-            
-            # Ensure default groups exist, preserving any manually added ones
-            default_groups = [(str(i), 1) for i in range(1, 10)]
-            for name, scorable in default_groups:
-                conn.execute(
-                    "INSERT OR IGNORE INTO groups(name, scorable) VALUES(?, ?)",
-                    (name, scorable)
-                )
-        # sessions and settings
-        conn.executescript(
-            """
+            -- sessions and settings
             CREATE TABLE IF NOT EXISTS sessions (
               id INTEGER PRIMARY KEY AUTOINCREMENT,
               name TEXT NOT NULL UNIQUE,
@@ -72,35 +242,31 @@ def init_db() -> None:
               key TEXT PRIMARY KEY,
               value TEXT NOT NULL
             );
-            CREATE TABLE IF NOT EXISTS locks2 (
-              rater TEXT NOT NULL,
-              token TEXT NOT NULL,
-              expires_at TEXT NOT NULL,
-              session_id INTEGER NOT NULL,
-              PRIMARY KEY (rater, session_id)
-            );
-            CREATE TABLE IF NOT EXISTS submissions2 (
-              rater TEXT NOT NULL,
-              created_at TEXT NOT NULL,
-              session_id INTEGER NOT NULL,
-              PRIMARY KEY (rater, session_id)
-            );
-            CREATE TABLE IF NOT EXISTS scores2 (
-              rater TEXT NOT NULL,
-              target TEXT NOT NULL,
-              total REAL NOT NULL,
-              solve REAL,
-              logic REAL,
-              analysis REAL,
-              session_id INTEGER NOT NULL,
-              PRIMARY KEY (rater, target, session_id)
-            );
-            CREATE TABLE IF NOT EXISTS presentation_order2 (
-              id INTEGER PRIMARY KEY,
-              rater TEXT NOT NULL,
-              position INTEGER NOT NULL,
-              session_id INTEGER NOT NULL
-            );
+            """
+        )
+        # Seed groups if they don't exist
+        # Add scorable column if not exists
+        try:
+            conn.execute("ALTER TABLE groups ADD COLUMN scorable INTEGER NOT NULL DEFAULT 1")
+        except Exception:
+            pass  # Column likely already exists
+        # 旧库中该列可为空：一次性补齐，查询中即可直接使用 scorable=1
+        conn.execute("UPDATE groups SET scorable=1 WHERE scorable IS NULL")
+
+        # Ensure default groups exist, preserving any manually added ones
+        default_groups = [(str(i), 1) for i in range(1, 10)]
+        conn.executemany("INSERT OR IGNORE INTO groups(name, scorable) VALUES(?, ?)", default_groups)
+        _ensure_session_tables(conn)
+        # 索引需在按场次划分的表重建之后创建
+        conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_scores2_sid_rater ON scores2(session_id, rater);
+            CREATE INDEX IF NOT EXISTS idx_scores2_sid_target ON scores2(session_id, target);
+            CREATE INDEX IF NOT EXISTS idx_submissions2_sid_rater ON submissions2(session_id, rater);
+            CREATE INDEX IF NOT EXISTS idx_locks2_sid_rater ON locks2(session_id, rater);
+            CREATE INDEX IF NOT EXISTS idx_presorder_sid ON presentation_order2(session_id, position);
+            CREATE INDEX IF NOT EXISTS idx_groups_name_scorable ON groups(name, scorable);
+            CREATE INDEX IF NOT EXISTS idx_groups_scorable ON groups(scorable);
             """
         )
 
@@ -122,39 +288,58 @@ def init_db() -> None:
         # Migrate legacy data into session-scoped tables if empty
         has_scores2 = conn.execute("SELECT COUNT(*) AS c FROM scores2").fetchone()[0]
         if has_scores2 == 0:
-            # submissions
-            for r in conn.execute("SELECT rater, created_at FROM submissions").fetchall():
-                conn.execute(
-                    "INSERT OR IGNORE INTO submissions2(rater, created_at, session_id) VALUES(?,?,?)",
-                    (r["rater"], r["created_at"], sid),
-                )
-            # scores
-            for r in conn.execute("SELECT rater, target, total, solve, logic, analysis FROM scores").fetchall():
-                conn.execute(
-                    "INSERT OR IGNORE INTO scores2(rater, target, total, solve, logic, analysis, session_id) VALUES(?,?,?,?,?,?,?)",
-                    (r["rater"], r["target"], r["total"], r["solve"], r["logic"], r["analysis"], sid),
-                )
-            # locks
-            for r in conn.execute("SELECT rater, token, expires_at FROM locks").fetchall():
-                conn.execute(
-                    "INSERT OR IGNORE INTO locks2(rater, token, expires_at, session_id) VALUES(?,?,?,?)",
-                    (r["rater"], r["token"], r["expires_at"], sid),
-                )
+            # 整表 INSERT ... SELECT，数据不经过 Python 逐行搬运
+            conn.execute(
+                "INSERT OR IGNORE INTO submissions2(rater, created_at, session_id)"
+                " SELECT rater, created_at, ? FROM submissions",
+                (sid,),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO scores2(rater, target, total, solve, logic, analysis, session_id)"
+                " SELECT rater, target, total, solve, logic, analysis, ? FROM scores",
+                (sid,),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO locks2(rater, token, expires_at, session_id)"
+                " SELECT rater, token, expires_at, ? FROM locks",
+                (sid,),
+            )
             # presentation order (legacy optional)
             try:
-                for r in conn.execute("SELECT id, rater, position FROM presentation_order").fetchall():
-                    conn.execute(
-                        "INSERT OR IGNORE INTO presentation_order2(id, rater, position, session_id) VALUES(?,?,?,?)",
-                        (r["id"], r["rater"], r["position"], sid),
-                    )
-            except Exception:
-                pass
+                conn.execute(
+                    "INSERT OR IGNORE INTO presentation_order2(id, rater, position, session_id)"
+                    " SELECT id, rater, position, ? FROM presentation_order",
+                    (sid,),
+                )
+            except sqlite3.OperationalError:
+                pass  # 旧版 presentation_order 表不存在
+
+        # 旧数据中的锁过期时间为 ISO 字符串，统一转换为 Unix 时间戳（无法解析的视为已过期）
+        conn.execute(
+            "UPDATE locks2 SET expires_at = COALESCE(CAST(strftime('%s', expires_at) AS INTEGER), 0)"
+            " WHERE typeof(expires_at) = 'text'"
+        )
+
+        # 更新统计信息，让查询规划器选用上面的索引
+        conn.execute("ANALYZE")
 
 
 def reset_all() -> None:
-    if DB_PATH.exists():
-        DB_PATH.unlink()
+    global _submitted_gen
+    # 连接是长期复用的，不能直接删除数据库文件；改为删除所有表后重新初始化
+    with get_writer_conn() as conn:
+        tables = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        for (name,) in tables:
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+    with _submitted_lock:
+        _submitted.clear()
+        _submitted_gen += 1
+    _avg_cache.clear()
     init_db()
+    _set_active_sid_cache(None)
+    _invalidate_cache()
 
 
 @dataclass
@@ -168,42 +353,68 @@ def _now() -> datetime:
     return datetime.utcnow()
 
 
+# 当前活跃场次 id 的缓存：(id, 载入时间)；本进程内由 create_session / set_active_session /
+# reset_all 直接更新，超过 _SHARED_CACHE_TTL 后重新读取以看到其他进程切换的场次
+_ACTIVE_SID: Optional[Tuple[int, float]] = None
+_ACTIVE_SID_GEN = 0
+_ACTIVE_SID_LOCK = threading.Lock()
+
+
+def _set_active_sid_cache(sid: Optional[int]) -> None:
+    """切换场次后调用；递增代数，使切换前开始的读取不会写回旧值"""
+    global _ACTIVE_SID, _ACTIVE_SID_GEN
+    with _ACTIVE_SID_LOCK:
+        _ACTIVE_SID_GEN += 1
+        _ACTIVE_SID = None if sid is None else (sid, time.monotonic())
+
+
 def _active_session_id(conn: sqlite3.Connection) -> int:
+    global _ACTIVE_SID
+    now = time.monotonic()
+    with _ACTIVE_SID_LOCK:
+        cached = _ACTIVE_SID
+        gen = _ACTIVE_SID_GEN
+    if cached is not None and now - cached[1] < _SHARED_CACHE_TTL:
+        return cached[0]
     row = conn.execute("SELECT value FROM settings WHERE key='active_session_id'").fetchone()
     if not row:
-        # Fallback: create default session
-        conn.execute(
-            "INSERT INTO sessions(name, created_at) VALUES(?, ?)",
-            ("默认场次", _now().isoformat()),
-        )
-        sid = conn.execute("SELECT id FROM sessions WHERE name=?", ("默认场次",)).fetchone()[0]
-        conn.execute(
-            "INSERT OR REPLACE INTO settings(key, value) VALUES('active_session_id', ?)",
-            (str(sid),),
-        )
-        return int(sid)
-    return int(row[0])
+        # Fallback: create default session（传入的可能是只读连接，改用写连接）
+        with get_writer_conn() as w:
+            w.execute(
+                "INSERT OR IGNORE INTO sessions(name, created_at) VALUES(?, ?)",
+                ("默认场次", _now().isoformat()),
+            )
+            sid = w.execute("SELECT id FROM sessions WHERE name=?", ("默认场次",)).fetchone()[0]
+            w.execute(
+                "INSERT OR REPLACE INTO settings(key, value) VALUES('active_session_id', ?)",
+                (str(sid),),
+            )
+    else:
+        sid = row[0]
+    with _ACTIVE_SID_LOCK:
+        # 读取期间场次已被切换时，读到的可能是旧值，不写入缓存
+        if gen == _ACTIVE_SID_GEN:
+            _ACTIVE_SID = (int(sid), now)
+    return int(sid)
 
 
-def list_sessions() -> List[dict]:
-    with get_conn() as conn:
+def list_sessions(conn: Optional[sqlite3.Connection] = None) -> List[dict]:
+    with _use_conn(conn) as conn:
         sid = _active_session_id(conn)
-        rows = conn.execute(
-            "SELECT id, name, created_at FROM sessions ORDER BY id DESC"
-        ).fetchall()
+        rows = conn.execute("SELECT id, name, created_at FROM sessions ORDER BY id DESC")
         return [
             {
-                "id": int(r["id"]),
-                "name": r["name"],
-                "created_at": r["created_at"],
-                "active": int(r["id"]) == sid,
+                "id": int(id_),
+                "name": name,
+                "created_at": created_at,
+                "active": int(id_) == sid,
             }
-            for r in rows
+            for id_, name, created_at in rows
         ]
 
 
 def create_session(name: str) -> int:
-    with get_conn() as conn:
+    with get_writer_conn() as conn:
         conn.execute(
             "INSERT INTO sessions(name, created_at) VALUES(?, ?)",
             (name, _now().isoformat()),
@@ -213,56 +424,56 @@ def create_session(name: str) -> int:
             "INSERT OR REPLACE INTO settings(key, value) VALUES('active_session_id', ?)",
             (str(sid),),
         )
-        return int(sid)
+    _set_active_sid_cache(int(sid))
+    _invalidate_cache()
+    return int(sid)
 
 
-def set_active_session(session_id: int) -> None:
-    with get_conn() as conn:
+def set_active_session(session_id: int) -> bool:
+    """切换当前活跃场次；场次不存在时返回 False（否则后续写入会违反外键约束）"""
+    with get_writer_conn() as conn:
+        if not conn.execute("SELECT 1 FROM sessions WHERE id=?", (session_id,)).fetchone():
+            return False
         conn.execute(
             "INSERT OR REPLACE INTO settings(key, value) VALUES('active_session_id', ?)",
             (str(session_id),),
         )
+    _set_active_sid_cache(int(session_id))
+    _invalidate_cache()
+    return True
 
 
 def delete_session(session_id: int) -> bool:
     """删除一个场次及其所有相关数据"""
-    with get_conn() as conn:
+    with get_writer_conn() as conn:
         # 检查是否是当前活跃场次
         current_sid = _active_session_id(conn)
         if session_id == current_sid:
             return False  # 不能删除当前场次
         
-        # 删除该场次的所有数据
-        conn.execute("DELETE FROM scores2 WHERE session_id=?", (session_id,))
-        conn.execute("DELETE FROM submissions2 WHERE session_id=?", (session_id,))
-        conn.execute("DELETE FROM locks2 WHERE session_id=?", (session_id,))
+        # 该场次的评分、提交、锁与发表顺序通过外键级联删除
         conn.execute("DELETE FROM sessions WHERE id=?", (session_id,))
-        return True
+    _discard_submitted(session_id)
+    _avg_cache.pop(session_id, None)
+    return True
 
 
 def acquire_lock(rater: str, token: str, expiry_minutes: int) -> Tuple[bool, bool]:
     """Return (acquired_or_still_held, held_by_me)."""
-    with get_conn() as conn:
+    # 写连接以 BEGIN IMMEDIATE 开启事务：先读后写期间不会有并发请求同时判定锁空闲
+    with get_writer_conn() as conn:
         sid = _active_session_id(conn)
+        # 只取未过期的锁；过期比较在 SQLite 内完成
         row = conn.execute(
-            "SELECT token, expires_at FROM locks2 WHERE rater=? AND session_id=?",
+            "SELECT token FROM locks2 WHERE rater=? AND session_id=?"
+            " AND expires_at >= CAST(strftime('%s', 'now') AS INTEGER)",
             (rater, sid),
         ).fetchone()
-        now = _now()
         if row is None:
-            expires = now + timedelta(minutes=expiry_minutes)
+            # 无锁或已过期：直接覆盖
             conn.execute(
                 "INSERT OR REPLACE INTO locks2(rater, token, expires_at, session_id) VALUES(?,?,?,?)",
-                (rater, token, expires.isoformat(), sid),
-            )
-            return True, True
-        # Check expiry
-        existing_exp = datetime.fromisoformat(row["expires_at"])
-        if existing_exp < now:
-            expires = now + timedelta(minutes=expiry_minutes)
-            conn.execute(
-                "UPDATE locks2 SET token=?, expires_at=? WHERE rater=? AND session_id=?",
-                (token, expires.isoformat(), rater, sid),
+                (rater, token, int(time.time()) + expiry_minutes * 60, sid),
             )
             return True, True
         if row["token"] == token:
@@ -271,7 +482,7 @@ def acquire_lock(rater: str, token: str, expiry_minutes: int) -> Tuple[bool, boo
 
 
 def get_lock(rater: str) -> Optional[Lock]:
-    with get_conn() as conn:
+    with get_reader_conn() as conn:
         sid = _active_session_id(conn)
         row = conn.execute(
             "SELECT token, expires_at FROM locks2 WHERE rater=? AND session_id=?",
@@ -279,11 +490,13 @@ def get_lock(rater: str) -> Optional[Lock]:
         ).fetchone()
         if not row:
             return None
-        return Lock(rater=rater, token=row["token"], expires_at=datetime.fromisoformat(row["expires_at"]))
+        token, expires_at = row
+        expires = datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+        return Lock(rater=rater, token=token, expires_at=expires)
 
 
 def release_lock(rater: str) -> None:
-    with get_conn() as conn:
+    with get_writer_conn() as conn:
         sid = _active_session_id(conn)
         conn.execute("DELETE FROM locks2 WHERE rater=? AND session_id=?", (rater, sid))
 
@@ -298,22 +511,103 @@ class ScoreRecord:
     analysis: Optional[float]
 
 
+# 各场次已提交的评分者集合：session_id -> (载入时间, 集合)；本进程的写操作同步维护，
+# 超过 _SHARED_CACHE_TTL 后重新加载以看到其他进程的提交与解锁
+_submitted: Dict[int, Tuple[float, Set[str]]] = {}
+_submitted_gen = 0
+_submitted_lock = threading.Lock()
+
+
+def _submitted_raters(conn: sqlite3.Connection, sid: int) -> Set[str]:
+    """返回的集合只读：更新时整体替换，不在原集合上修改"""
+    now = time.monotonic()
+    with _submitted_lock:
+        entry = _submitted.get(sid)
+        gen = _submitted_gen
+    if entry and now - entry[0] < _SHARED_CACHE_TTL:
+        return entry[1]
+    rows = conn.execute("SELECT rater FROM submissions2 WHERE session_id=?", (sid,))
+    raters = {r[0] for r in rows}
+    with _submitted_lock:
+        # 加载期间本进程有提交或解锁时，读到的结果可能已过时，不写入缓存
+        if gen == _submitted_gen:
+            _submitted[sid] = (now, raters)
+    return raters
+
+
+def _mark_submitted(sid: int, rater: str) -> None:
+    global _submitted_gen
+    with _submitted_lock:
+        _submitted_gen += 1
+        entry = _submitted.get(sid)
+        if entry is not None:
+            _submitted[sid] = (entry[0], entry[1] | {rater})
+
+
+def _discard_submitted(sid: int, rater: Optional[str] = None) -> None:
+    """提交记录被删除后调用；rater 为 None 时丢弃整个场次的集合"""
+    global _submitted_gen
+    with _submitted_lock:
+        _submitted_gen += 1
+        entry = _submitted.get(sid)
+        if rater is None:
+            _submitted.pop(sid, None)
+        elif entry is not None:
+            _submitted[sid] = (entry[0], entry[1] - {rater})
+
+
+def get_submitted_raters(conn: Optional[sqlite3.Connection] = None) -> Set[str]:
+    """获取当前场次已提交评分的评分者集合（副本，可供调用方批量判断）"""
+    with _use_conn(conn) as conn:
+        sid = _active_session_id(conn)
+        return set(_submitted_raters(conn, sid))
+
+
 def get_existing_submission(rater: str) -> bool:
-    with get_conn() as conn:
+    with get_reader_conn() as conn:
         sid = _active_session_id(conn)
-        row = conn.execute(
-            "SELECT 1 FROM submissions2 WHERE rater=? AND session_id=?",
-            (rater, sid),
-        ).fetchone()
-        return row is not None
+        return rater in _submitted_raters(conn, sid)
 
 
 def delete_submissions_by_rater(rater: str) -> None:
     """删除指定评分者的所有评分记录"""
-    with get_conn() as conn:
+    with get_writer_conn() as conn:
+        sid = _active_session_id(conn)
+        conn.execute("DELETE FROM scores2 WHERE rater=? AND session_id=?", (rater, sid))
+        conn.execute("DELETE FROM submissions2 WHERE rater=? AND session_id=?", (rater, sid))
+    _discard_submitted(sid, rater)
+    _bump_scores_version()
+
+
+def unlock_rater(rater: str) -> None:
+    """释放锁并删除提交记录（允许重新提交），同一事务内完成"""
+    with get_writer_conn() as conn:
+        sid = _active_session_id(conn)
+        conn.execute("DELETE FROM locks2 WHERE rater=? AND session_id=?", (rater, sid))
+        conn.execute("DELETE FROM submissions2 WHERE rater=? AND session_id=?", (rater, sid))
+    _discard_submitted(sid, rater)
+
+
+def reset_rater(rater: str) -> None:
+    """重置某个评分组的所有评分并解锁"""
+    with get_writer_conn() as conn:
         sid = _active_session_id(conn)
         conn.execute("DELETE FROM scores2 WHERE rater=? AND session_id=?", (rater, sid))
         conn.execute("DELETE FROM submissions2 WHERE rater=? AND session_id=?", (rater, sid))
+        conn.execute("DELETE FROM locks2 WHERE rater=? AND session_id=?", (rater, sid))
+    _discard_submitted(sid, rater)
+    _bump_scores_version()
+
+
+def delete_score(rater: str, target: str) -> None:
+    """删除某评分组对某个组的单条评分"""
+    with get_writer_conn() as conn:
+        sid = _active_session_id(conn)
+        conn.execute(
+            "DELETE FROM scores2 WHERE rater=? AND target=? AND session_id=?",
+            (rater, target, sid),
+        )
+    _bump_scores_version()
 
 
 def list_targets_for_rater(rater: str) -> List[dict]:
@@ -321,58 +615,44 @@ def list_targets_for_rater(rater: str) -> List[dict]:
     获取评分目标列表
     返回格式：[{"name": "1", "disabled": False}, {"name": "2", "disabled": True}, ...]
     """
-    with get_conn() as conn:
-        rows = conn.execute("SELECT name, COALESCE(scorable, 1) as scorable FROM groups").fetchall()
-        # 排除教学组和不可被评分的组，但包括自己（标记为禁用）
-        targets = []
-        for r in rows:
-            if r["name"] == "教学组" or not r["scorable"]:
-                continue
-            targets.append({
-                "name": r["name"],
-                "disabled": r["name"] == rater  # 自己的组禁用
-            })
-        
-        # 获取发表顺序，如果存在则按照顺序排列目标
-        presentation_order = get_presentation_order()
-        if presentation_order:
-            # 按照发表顺序排序
-            ordered_targets = []
-            # 先添加有序的
-            for group in presentation_order:
-                target = next((t for t in targets if t["name"] == group), None)
-                if target:
-                    ordered_targets.append(target)
-            # 再添加剩余的
-            for target in targets:
-                if target not in ordered_targets:
-                    ordered_targets.append(target)
-            return ordered_targets
-        
-        return sorted(targets, key=lambda x: x["name"])
+    with get_reader_conn() as conn:
+        sid = _active_session_id(conn)
+        # 排除教学组和不可被评分的组，但包括自己（标记为禁用）；有发表顺序的排在前面
+        rows = conn.execute(
+            """
+            SELECT g.name
+            FROM groups g
+            LEFT JOIN presentation_order2 p ON p.rater = g.name AND p.session_id = ?
+            WHERE g.name <> '教学组' AND g.scorable = 1
+            GROUP BY g.name
+            ORDER BY MIN(p.position) IS NULL, MIN(p.position), g.name
+            """,
+            (sid,),
+        )
+        return [{"name": name, "disabled": name == rater} for (name,) in rows]  # 自己的组禁用
 
 
 def get_scores_by_rater(rater: str) -> dict:
     """获取指定评分者的所有评分记录"""
-    with get_conn() as conn:
+    with get_reader_conn() as conn:
         sid = _active_session_id(conn)
         rows = conn.execute(
             "SELECT target, total, solve, logic, analysis FROM scores2 WHERE rater=? AND session_id=?",
             (rater, sid),
-        ).fetchall()
+        )
         return {
-            r["target"]: {
-                "total": r["total"],
-                "solve": r["solve"],
-                "logic": r["logic"],
-                "analysis": r["analysis"],
+            target: {
+                "total": total,
+                "solve": solve,
+                "logic": logic,
+                "analysis": analysis,
             }
-            for r in rows
+            for target, total, solve, logic, analysis in rows
         }
 
 
 def insert_submission(rater: str, records: Iterable[ScoreRecord]) -> None:
-    with get_conn() as conn:
+    with get_writer_conn() as conn:
         sid = _active_session_id(conn)
         # overwrite existing
         conn.execute("DELETE FROM scores2 WHERE rater=? AND session_id=?", (rater, sid))
@@ -382,118 +662,130 @@ def insert_submission(rater: str, records: Iterable[ScoreRecord]) -> None:
         )
         conn.executemany(
             "INSERT INTO scores2(rater, target, total, solve, logic, analysis, session_id) VALUES(?,?,?,?,?,?,?)",
-            [
+            (
                 (rec.rater, rec.target, rec.total, rec.solve, rec.logic, rec.analysis, sid)
                 for rec in records
-            ],
+            ),
         )
+    _mark_submitted(sid, rater)
+    _bump_scores_version()
 
 
-def compute_averages() -> List[dict]:
+def compute_averages(conn: Optional[sqlite3.Connection] = None) -> List[dict]:
     """计算平均分，只包含可被评分的组（scorable=True）"""
-    with get_conn() as conn:
+    with _use_conn(conn) as conn:
         sid = _active_session_id(conn)
+        version = _scores_version
+        now = time.monotonic()
+        cached = _avg_cache.get(sid)
+        if cached and cached[0] == version and now - cached[1] < _SHARED_CACHE_TTL:
+            return cached[2]
         rows = conn.execute(
             """
             SELECT s.target, AVG(s.total) AS avg_total, COUNT(*) AS cnt
             FROM scores2 s
             JOIN groups g ON s.target = g.name
-            WHERE s.session_id=? AND COALESCE(g.scorable, 1) = 1
+            WHERE s.session_id=? AND g.scorable = 1
             GROUP BY s.target
             ORDER BY AVG(s.total) DESC
             """,
             (sid,),
-        ).fetchall()
-        return [
-            {"target": r["target"], "average": float(r["avg_total"]) if r["avg_total"] is not None else 0.0, "count": int(r["cnt"])}
-            for r in rows
+        )
+        averages = [
+            {"target": target, "average": float(avg_total) if avg_total is not None else 0.0, "count": int(cnt)}
+            for target, avg_total, cnt in rows
         ]
+        _avg_cache[sid] = (version, now, averages)
+        return averages
+
+
+def _score_dict(
+    rater: str,
+    target: str,
+    total: Optional[float],
+    solve: Optional[float],
+    logic: Optional[float],
+    analysis: Optional[float],
+) -> dict:
+    return {
+        "rater": rater,
+        "target": target,
+        "total": float(total) if total is not None else 0.0,
+        "solve": float(solve) if solve is not None else None,
+        "logic": float(logic) if logic is not None else None,
+        "analysis": float(analysis) if analysis is not None else None,
+    }
+
+
+def get_all_scores(conn: Optional[sqlite3.Connection] = None) -> List[dict]:
+    """获取所有评分数据，包括详细的每组对每组的评分"""
+    with _use_conn(conn) as conn:
+        sid = _active_session_id(conn)
+        rows = conn.execute(
+            """
+            SELECT s.rater, s.target, s.total, s.solve, s.logic, s.analysis
+            FROM scores2 s
+            WHERE s.session_id=?
+            ORDER BY s.rater, s.target
+            """,
+            (sid,),
+        )
+        return [_score_dict(*row) for row in rows]
 
 
-def get_all_scores() -> List[dict]:
-    """获取所有评分数据，包括详细的每组对每组的评分"""
-    with get_conn() as conn:
+def get_scorable_scores(conn: Optional[sqlite3.Connection] = None) -> List[dict]:
+    """获取评分者与被评分者均为可评分组的评分（用于管理面板评分矩阵）"""
+    with _use_conn(conn) as conn:
         sid = _active_session_id(conn)
         rows = conn.execute(
             """
             SELECT s.rater, s.target, s.total, s.solve, s.logic, s.analysis
             FROM scores2 s
+            JOIN groups g1 ON g1.name = s.rater AND g1.scorable = 1
+            JOIN groups g2 ON g2.name = s.target AND g2.scorable = 1
             WHERE s.session_id=?
             ORDER BY s.rater, s.target
             """,
             (sid,),
-        ).fetchall()
-        
-        results = []
-        for row in rows:
-            results.append({
-                "rater": row["rater"],
-                "target": row["target"],
-                "total": float(row["total"]) if row["total"] is not None else 0.0,
-                "solve": float(row["solve"]) if row["solve"] is not None else None,
-                "logic": float(row["logic"]) if row["logic"] is not None else None,
-                "analysis": float(row["analysis"]) if row["analysis"] is not None else None,
-            })
-        return results
-
-
-def get_presentation_order() -> List[str]:
+        )
+        return [_score_dict(*row) for row in rows]
+
+
+# 依赖当前场次：其他进程切换场次或保存顺序后，最多 _SHARED_CACHE_TTL 秒内生效
+@ttl_cache(ttl=_SHARED_CACHE_TTL)
+def get_presentation_order(conn: Optional[sqlite3.Connection] = None) -> List[str]:
     """获取发表顺序，如果不存在则返回空列表"""
     try:
-        with get_conn() as conn:
+        with _use_conn(conn) as conn:
             sid = _active_session_id(conn)
-            # 确保表存在
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS presentation_order2 (
-                    id INTEGER PRIMARY KEY,
-                    rater TEXT NOT NULL,
-                    position INTEGER NOT NULL,
-                    session_id INTEGER NOT NULL
-                )
-                """
-            )
             rows = conn.execute(
                 "SELECT rater FROM presentation_order2 WHERE session_id=? ORDER BY position ASC",
                 (sid,),
-            ).fetchall()
-            
-            if rows:
-                return [r["rater"] for r in rows]
-            return []
+            )
+            return [rater for (rater,) in rows]
     except Exception as e:
         print(f"获取发表顺序出错: {e}")
         return []
 
 
-def get_all_groups() -> List[dict]:
+@ttl_cache(ttl=_SHARED_CACHE_TTL)
+def get_all_groups(conn: Optional[sqlite3.Connection] = None) -> List[dict]:
     """Get all groups with their scorable status"""
-    with get_conn() as conn:
-        # Add scorable column if not exists
-        try:
-            conn.execute("ALTER TABLE groups ADD COLUMN scorable INTEGER DEFAULT 1")
-        except Exception:
-            pass  # Column already exists
-
-        rows = conn.execute("SELECT name, COALESCE(scorable, 1) as scorable FROM groups ORDER BY name").fetchall()
-        return [{"name": r["name"], "scorable": bool(r["scorable"])} for r in rows]
+    with _use_conn(conn) as conn:
+        rows = conn.execute("SELECT name, scorable FROM groups ORDER BY name")
+        return [{"name": name, "scorable": bool(scorable)} for name, scorable in rows]
 
 
 def add_group(name: str, scorable: bool = True) -> bool:
     """Add a new group"""
     try:
-        with get_conn() as conn:
-            # Add scorable column if not exists
-            try:
-                conn.execute("ALTER TABLE groups ADD COLUMN scorable INTEGER DEFAULT 1")
-            except Exception:
-                pass
-
+        with get_writer_conn() as conn:
             conn.execute(
                 "INSERT INTO groups(name, scorable) VALUES(?, ?)",
                 (name, 1 if scorable else 0),
             )
-            return True
+        _invalidate_cache()
+        return True
     except sqlite3.IntegrityError:
         # Group already exists
         return False
@@ -505,9 +797,10 @@ def add_group(name: str, scorable: bool = True) -> bool:
 def delete_group(name: str) -> bool:
     """Delete a group"""
     try:
-        with get_conn() as conn:
+        with get_writer_conn() as conn:
             conn.execute("DELETE FROM groups WHERE name=?", (name,))
-            return True
+        _invalidate_cache()
+        return True
     except Exception:
         return False
 
@@ -515,18 +808,13 @@ def delete_group(name: str) -> bool:
 def toggle_group_scorable(name: str, scorable: bool) -> bool:
     """Toggle whether a group can be scored"""
     try:
-        with get_conn() as conn:
-            # Add scorable column if not exists
-            try:
-                conn.execute("ALTER TABLE groups ADD COLUMN scorable INTEGER DEFAULT 1")
-            except Exception:
-                pass
-
+        with get_writer_conn() as conn:
             conn.execute(
                 "UPDATE groups SET scorable=? WHERE name=?",
                 (1 if scorable else 0, name),
             )
-            return True
+        _invalidate_cache()
+        return True
     except Exception:
         return False
 
@@ -534,119 +822,89 @@ def toggle_group_scorable(name: str, scorable: bool) -> bool:
 def save_presentation_order(order: List[str]) -> bool:
     """保存发表顺序"""
     try:
-        with get_conn() as conn:
+        with get_writer_conn() as conn:
             sid = _active_session_id(conn)
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS presentation_order2 (
-                    id INTEGER PRIMARY KEY,
-                    rater TEXT NOT NULL,
-                    position INTEGER NOT NULL,
-                    session_id INTEGER NOT NULL
-                )
-                """
-            )
             conn.execute("DELETE FROM presentation_order2 WHERE session_id=?", (sid,))
-            for i, r in enumerate(order):
-                conn.execute(
-                    "INSERT INTO presentation_order2(rater, position, session_id) VALUES(?, ?, ?)",
-                    (r, i, sid),
-                )
-            return True
+            conn.executemany(
+                "INSERT INTO presentation_order2(rater, position, session_id) VALUES(?, ?, ?)",
+                ((r, i, sid) for i, r in enumerate(order)),
+            )
+        _invalidate_cache()
+        return True
     except Exception as e:
         print(f"保存发表顺序出错: {e}")
         return False
 
 
-def detect_score_anomalies() -> List[dict]:
+def detect_score_anomalies(conn: Optional[sqlite3.Connection] = None) -> List[dict]:
     """
     检测评分异常
     返回异常评分列表，每项包含：rater, target, score, reason
     """
     anomalies = []
     
-    with get_conn() as conn:
+    with _use_conn(conn) as conn:
         sid = _active_session_id(conn)
         
-        # 获取每个组的所有评分，计算平均值和标准差
-        targets = conn.execute(
+        # 每条评分连同所属组的评分数、平均值、平方和一次查出（窗口函数）
+        rows = conn.execute(
             """
-            SELECT DISTINCT target FROM scores2 
-            WHERE session_id=? AND target IN (
-                SELECT name FROM groups WHERE COALESCE(scorable, 1) = 1
-            )
+            SELECT s.rater, s.target, s.total,
+                   COUNT(*) OVER w AS n,
+                   AVG(s.total) OVER w AS mean,
+                   SUM(s.total * s.total) OVER w AS sumsq
+            FROM scores2 s
+            JOIN groups g ON g.name = s.target
+            WHERE s.session_id=? AND g.scorable = 1
+            WINDOW w AS (PARTITION BY s.target)
+            ORDER BY s.target, s.rater
             """,
             (sid,)
-        ).fetchall()
+        )
         
-        for target_row in targets:
-            target = target_row["target"]
-            
-            # 获取该组的所有评分
-            scores = conn.execute(
-                "SELECT rater, total FROM scores2 WHERE target=? AND session_id=?",
-                (target, sid)
-            ).fetchall()
-            
-            if len(scores) < 3:
+        for rater, target, total, n, mean, sumsq in rows:
+            if n < 3:
                 continue  # 评分太少，无法判断异常
             
-            # 计算平均值和标准差
-            import statistics
-            score_values = [s["total"] for s in scores]
-            mean = statistics.mean(score_values)
-            std_dev = statistics.stdev(score_values) if len(score_values) > 1 else 0
+            # 样本标准差：(Σx² - n·mean²) / (n - 1)
+            std_dev = math.sqrt(max(0.0, (sumsq - n * mean * mean) / (n - 1)))
             
             # 检测异常：超过 2 个标准差的评分
-            for score in scores:
-                deviation = abs(score["total"] - mean)
-                if std_dev > 0 and deviation > 2 * std_dev:
-                    reason = "过高" if score["total"] > mean else "过低"
-                    anomalies.append({
-                        "rater": score["rater"],
-                        "target": target,
-                        "score": score["total"],
-                        "mean": round(mean, 1),
-                        "deviation": round(deviation, 1),
-                        "reason": f"相比平均分({mean:.1f})偏{reason}"
-                    })
+            deviation = abs(total - mean)
+            if std_dev > 0 and deviation > 2 * std_dev:
+                reason = "过高" if total > mean else "过低"
+                anomalies.append({
+                    "rater": rater,
+                    "target": target,
+                    "score": total,
+                    "mean": round(mean, 1),
+                    "deviation": round(deviation, 1),
+                    "reason": f"相比平均分({mean:.1f})偏{reason}"
+                })
         
-        # 检测某个评分者的整体评分偏高或偏低
+        # 检测某个评分者的整体评分偏高或偏低（一次扫描同时得到各评分者平均分与全局平均分）
         raters = conn.execute(
-            "SELECT DISTINCT rater FROM scores2 WHERE session_id=?",
+            """
+            SELECT rater, AVG(total) AS avg_score,
+                   SUM(SUM(total)) OVER () / SUM(COUNT(*)) OVER () AS global_avg
+            FROM scores2
+            WHERE session_id=?
+            GROUP BY rater
+            ORDER BY rater
+            """,
             (sid,)
-        ).fetchall()
+        )
         
-        for rater_row in raters:
-            rater = rater_row["rater"]
-            
-            # 获取该评分者给出的所有分数
-            rater_scores = conn.execute(
-                "SELECT AVG(total) as avg_score FROM scores2 WHERE rater=? AND session_id=?",
-                (rater, sid)
-            ).fetchone()
-            
-            # 获取所有评分者的平均分
-            overall_avg = conn.execute(
-                "SELECT AVG(total) as avg_score FROM scores2 WHERE session_id=?",
-                (sid,)
-            ).fetchone()
-            
-            if rater_scores and overall_avg:
-                rater_avg = rater_scores["avg_score"]
-                global_avg = overall_avg["avg_score"]
-                
-                if abs(rater_avg - global_avg) > 15:  # 平均分差距超过15分
-                    reason = "整体偏高" if rater_avg > global_avg else "整体偏低"
-                    anomalies.append({
-                        "rater": rater,
-                        "target": "全部",
-                        "score": round(rater_avg, 1),
-                        "mean": round(global_avg, 1),
-                        "deviation": round(abs(rater_avg - global_avg), 1),
-                        "reason": f"{reason}（该评分者平均{rater_avg:.1f}，全局平均{global_avg:.1f}）"
-                    })
+        for rater, rater_avg, global_avg in raters:
+            if abs(rater_avg - global_avg) > 15:  # 平均分差距超过15分
+                reason = "整体偏高" if rater_avg > global_avg else "整体偏低"
+                anomalies.append({
+                    "rater": rater,
+                    "target": "全部",
+                    "score": round(rater_avg, 1),
+                    "mean": round(global_avg, 1),
+                    "deviation": round(abs(rater_avg - global_avg), 1),
+                    "reason": f"{reason}（该评分者平均{rater_avg:.1f}，全局平均{global_avg:.1f}）"
+                })
     
     return anomalies
-
-
@@ -6,20 +6,34 @@ from functools import wraps
 from typing import Callable, Optional
 from fastapi import HTTPException
 from datetime import datetime
+from pathlib import Path
 import logging
+import re
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app/logs/system.log'),
-        logging.StreamHandler()
-    ]
-)
+LOG_DIR = Path('app/logs')
+# 组别名称中需要移除的危险片段
+_DANGEROUS_RE = re.compile(r"""<|>|"|'|;|--|/\*|\*/|script""")
 logger = logging.getLogger(__name__)
 
 
+def setup_logging() -> None:
+    """
+    配置日志（由应用入口调用，导入本模块时不再打开日志文件）
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, logging.FileHandler) for h in root.handlers):
+        return
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'system.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
 def require_admin(admin_key: str):
     """
     管理员权限装饰器
@@ -34,7 +48,7 @@ def require_admin(admin_key: str):
         def wrapper(*args, **kwargs):
             key = kwargs.get('key') or (args[0] if args else None)
             if key != admin_key:
-                logger.warning(f"未授权访问尝试: {func.__name__}")
+                logger.warning("未授权访问尝试: %s", func.__name__)
                 raise HTTPException(status_code=403, detail="需要管理员密钥访问")
             return func(*args, **kwargs)
         return wrapper
@@ -50,24 +64,24 @@ def log_operation(operation_type: str):
     def decorator(func: Callable):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            logger.info(f"[{operation_type}] 开始执行: {func.__name__}")
+            logger.info("[%s] 开始执行: %s", operation_type, func.__name__)
             try:
                 result = await func(*args, **kwargs)
-                logger.info(f"[{operation_type}] 执行成功: {func.__name__}")
+                logger.info("[%s] 执行成功: %s", operation_type, func.__name__)
                 return result
             except Exception as e:
-                logger.error(f"[{operation_type}] 执行失败: {func.__name__} - {str(e)}")
+                logger.error("[%s] 执行失败: %s - %s", operation_type, func.__name__, e)
                 raise
                 
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            logger.info(f"[{operation_type}] 开始执行: {func.__name__}")
+            logger.info("[%s] 开始执行: %s", operation_type, func.__name__)
             try:
                 result = func(*args, **kwargs)
-                logger.info(f"[{operation_type}] 执行成功: {func.__name__}")
+                logger.info("[%s] 执行成功: %s", operation_type, func.__name__)
                 return result
             except Exception as e:
-                logger.error(f"[{operation_type}] 执行失败: {func.__name__} - {str(e)}")
+                logger.error("[%s] 执行失败: %s - %s", operation_type, func.__name__, e)
                 raise
         
         # 判断是否为异步函数
@@ -111,6 +125,16 @@ def safe_float(value: any, default: float = 0.0) -> float:
         return default
 
 
+def _strip_dangerous(s: str) -> str:
+    """
+    移除危险片段（移除后可能拼出新的危险片段，直到不再变化）
+    """
+    cleaned, n = _DANGEROUS_RE.subn('', s)
+    while n:
+        cleaned, n = _DANGEROUS_RE.subn('', cleaned)
+    return cleaned
+
+
 def sanitize_group_name(name: str) -> str:
     """
     清理组别名称（去除危险字符）
@@ -118,11 +142,7 @@ def sanitize_group_name(name: str) -> str:
     if not name:
         return ""
     # 移除潜在危险字符
-    dangerous_chars = ['<', '>', '"', "'", ';', '--', '/*', '*/', 'script']
-    sanitized = name.strip()
-    for char in dangerous_chars:
-        sanitized = sanitized.replace(char, '')
-    return sanitized[:50]  # 限制长度
+    return _strip_dangerous(name.strip())[:50]  # 限制长度
 
 
 def calculate_statistics(scores: list[float]) -> dict:
@@ -158,15 +178,15 @@ class AuditLogger:
     @staticmethod
     def log_score_submission(rater: str, target_count: int, ip_address: str = None):
         """记录评分提交"""
-        logger.info(f"[AUDIT] 评分提交 - 评分者: {rater}, 目标数: {target_count}, IP: {ip_address}")
+        logger.info("[AUDIT] 评分提交 - 评分者: %s, 目标数: %s, IP: %s", rater, target_count, ip_address)
     
     @staticmethod
     def log_admin_action(action: str, target: str, admin_ip: str = None):
         """记录管理员操作"""
-        logger.warning(f"[AUDIT] 管理员操作 - 动作: {action}, 目标: {target}, IP: {admin_ip}")
+        logger.warning("[AUDIT] 管理员操作 - 动作: %s, 目标: %s, IP: %s", action, target, admin_ip)
     
     @staticmethod
     def log_unlock(rater: str, unlocked_by: str = "admin"):
         """记录解锁操作"""
-        logger.info(f"[AUDIT] 解锁操作 - 组别: {rater}, 操作者: {unlocked_by}")
+        logger.info("[AUDIT] 解锁操作 - 组别: %s, 操作者: %s", rater, unlocked_by)
 